@@ -0,0 +1,224 @@
+# export.py
+"""
+Streaming timetable writers.
+
+Provides:
+- filter_events(events, teacher_id=None, room=None)
+- content_etag(events, fmt)
+- iter_ical(events, anchor, calname)
+- iter_csv(events)
+- iter_xlsx(events)
+
+events: list of event dicts as returned by scheduler.run_heuristic / run_ilp
+Every writer is a generator yielding bytes so responses can be streamed.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+FORMATS = {
+    "ics": ("text/calendar; charset=utf-8", "ics"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+COLUMNS = ["id", "title", "subject_id", "teacher_id", "day", "start", "end", "room"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+ICAL_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+# bump when the output of any writer changes so cached copies are invalidated
+EXPORT_VERSION = "1"
+
+def filter_events(events: List[Dict[str, Any]], teacher_id: Optional[str] = None, room: Optional[str] = None):
+    out = [
+        e for e in events
+        if (teacher_id is None or str(e.get("teacher_id")) == teacher_id)
+        and (room is None or str(e.get("room")) == room)
+    ]
+    # stable order so identical timetables hash and render identically
+    return sorted(out, key=lambda e: (e["day"], e["start"], str(e["room"]), e["id"]))
+
+def content_etag(events: List[Dict[str, Any]], fmt: str) -> str:
+    h = hashlib.sha256(f"{EXPORT_VERSION}:{fmt}:".encode())
+    h.update(json.dumps(events, sort_keys=True, separators=(",", ":"), default=str).encode())
+    # weak: the body may differ by gzip encoding and ical anchor week
+    return f'W/"{h.hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore W/ prefixes
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+# ---- iCalendar (RFC 5545) ----
+
+def _ical_text(value: Any) -> str:
+    s = "" if value is None else str(value)
+    return s.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ical_line(line: str) -> bytes:
+    # fold at 75 octets without splitting multi-byte characters
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    parts = []
+    cur = b""
+    limit = 75
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(cur) + len(b) > limit:
+            parts.append(cur)
+            cur = b""
+            limit = 74  # continuation lines start with a space
+        cur += b
+    parts.append(cur)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+def week_start(dt: datetime) -> datetime:
+    d = dt - timedelta(days=dt.weekday())
+    return d.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def iter_ical(events: Iterable[Dict[str, Any]], anchor: datetime, calname: str = "Timetable") -> Iterator[bytes]:
+    """Weekly recurring VEVENTs anchored on the week of `anchor` (floating local time)."""
+    monday = week_start(anchor)
+    stamp = anchor.strftime("%Y%m%dT%H%M%SZ")
+    yield b"".join(_ical_line(l) for l in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Advanced Timetable//Export//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ical_text(calname)}",
+    ))
+    for e in events:
+        day = monday + timedelta(days=int(e["day"]))
+        sh, sm = map(int, e["start"].split(":"))
+        eh, em = map(int, e["end"].split(":"))
+        dtstart = day.replace(hour=sh, minute=sm)
+        dtend = day.replace(hour=eh, minute=em)
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{_ical_text(e['id'])}@adv-timetable",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{dtstart.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{dtend.strftime('%Y%m%dT%H%M%S')}",
+            f"RRULE:FREQ=WEEKLY;BYDAY={ICAL_DAYS[int(e['day'])]}",
+            f"SUMMARY:{_ical_text(e.get('title'))}",
+        ]
+        if e.get("room") is not None:
+            lines.append(f"LOCATION:{_ical_text(e['room'])}")
+        if e.get("teacher_id") is not None:
+            lines.append(f"DESCRIPTION:{_ical_text('Teacher: ' + str(e['teacher_id']))}")
+        lines.append("END:VEVENT")
+        yield b"".join(_ical_line(l) for l in lines)
+    yield _ical_line("END:VCALENDAR")
+
+# ---- CSV ----
+
+def iter_csv(events: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for e in events:
+        writer.writerow(["" if e.get(c) is None else e.get(c) for c in COLUMNS])
+        # flush every row so memory stays flat regardless of timetable size
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0); buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+# ---- XLSX (minimal SpreadsheetML written straight into a streamed zip) ----
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Timetable" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+class _ChunkSink:
+    # write-only, non-seekable file object; zipfile falls back to data descriptors
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks = []
+        return out
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+def _xlsx_row(values: List[Any]) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+def iter_xlsx(events: Iterable[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, body in _XLSX_STATIC.items():
+            zf.writestr(name, body)
+        yield sink.drain()
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(COLUMNS + ["day_name"]).encode("utf-8"))
+            for i, e in enumerate(events, 1):
+                row = [e.get(c) for c in COLUMNS] + [DAY_NAMES[int(e["day"])]]
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                if i % chunk_rows == 0:
+                    out = sink.drain()
+                    if out:
+                        yield out
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
@@ -1,11 +1,14 @@
 # main.py
-from fastapi import FastAPI, Depends, UploadFile, File, HTTPException
+from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-import shutil, os
-import db, models, auth, utils, scheduler
+import shutil, os, json
+from functools import lru_cache
+import db, models, auth, utils, scheduler, export
 from db import init_db, engine
-from typing import List
+from typing import List, Optional
 import pandas as pd
 
 app = FastAPI(title="Advanced Timetable API")
@@ -15,7 +18,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Disposition"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Initialize DB
 init_db()
@@ -133,5 +138,80 @@ def run_scheduler(algorithm: str = "heuristic", token: str = Depends(auth.oauth2
         events = scheduler.run_ilp(data, cfg)
     else:
         events = scheduler.run_heuristic(data, cfg)
-    # Return events JSON; also could save to DB
-    return {"events": events}
+    # Save the run so exports can be served without re-solving
+    events = export.filter_events(events)
+    with Session(engine) as session:
+        run = models.TimetableRun(
+            algorithm=algorithm,
+            events_json=json.dumps(events, default=str),
+            etag=export.content_etag(events, "json"),
+            created_by=user_id,
+        )
+        session.add(run); session.commit(); session.refresh(run)
+        return {"run_id": run.id, "etag": run.etag, "events": events}
+
+# Timetable runs are immutable, so parsed events can be cached by id
+@lru_cache(maxsize=8)
+def load_run_events(run_id: int):
+    with Session(engine) as session:
+        run = session.get(models.TimetableRun, run_id)
+        return json.loads(run.events_json)
+
+def latest_run(user_id: int):
+    with Session(engine) as session:
+        run = session.exec(
+            select(models.TimetableRun)
+            .where(models.TimetableRun.created_by == user_id)
+            .order_by(models.TimetableRun.id.desc())
+        ).first()
+        if not run:
+            raise HTTPException(status_code=404, detail="No timetable generated yet")
+        return run
+
+def not_modified(etag: str):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+# Latest saved timetable as JSON; 304 when the client's copy is current
+@app.get("/timetable")
+def get_timetable(response: Response, if_none_match: Optional[str] = Header(None), token: str = Depends(auth.oauth2_scheme)):
+    payload = auth.decode_token(token)
+    user_id = int(payload.get("sub"))
+    run = latest_run(user_id)
+    if export.etag_matches(if_none_match, run.etag):
+        return not_modified(run.etag)
+    response.headers["ETag"] = run.etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {"run_id": run.id, "etag": run.etag, "events": load_run_events(run.id)}
+
+# Stream a teacher or room timetable: kind = teacher|room, format = ics|csv|xlsx
+@app.get("/export/{kind}/{key}")
+def export_timetable(kind: str, key: str, format: str = "ics", if_none_match: Optional[str] = Header(None), token: str = Depends(auth.oauth2_scheme)):
+    payload = auth.decode_token(token)
+    user_id = int(payload.get("sub"))
+    if kind not in ("teacher", "room"):
+        raise HTTPException(status_code=404, detail="Unknown export kind")
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    run = latest_run(user_id)
+    events = load_run_events(run.id)
+    if kind == "teacher":
+        events = export.filter_events(events, teacher_id=key)
+    else:
+        events = export.filter_events(events, room=key)
+    etag = export.content_etag(events, format)
+    if export.etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    media_type, ext = export.FORMATS[format]
+    safe_key = "".join(c if c.isalnum() or c in "-_." else "_" for c in key)
+    if format == "ics":
+        body = export.iter_ical(events, run.created_at, calname=f"{kind.title()} {key}")
+    elif format == "csv":
+        body = export.iter_csv(events)
+    else:
+        body = export.iter_xlsx(events)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{kind}-{safe_key}.{ext}"',
+    }
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -17,6 +17,14 @@ class Upload(SQLModel, table=True):
     uploaded_by: Optional[int] = Field(default=None, foreign_key="user.id")
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
 
+class TimetableRun(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    algorithm: str
+    events_json: str
+    etag: str
+    created_by: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 # Request models for API
 class LoginRequest(BaseModel):
     email: str